@@ -7,22 +7,24 @@ import logging
 import pandas as pd
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
-from google.adk.plugins.logging_plugin import LoggingPlugin
 
 import data_loader
 import tools
 import agents
+import correlation
+import ticket_store
+from plugins import StructuredLoggingPlugin
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # --- Analysis orchestration ---
-def sequential_analysis(project_id, days, session_id="session-1"):
+def billing_rows_for_detector(project_id, days):
     # Step A: call the BQ tool (local callable)
     try:
         bq_res = tools.bq_query_cost_by_project(project_id, days)
     except Exception as e:
-        logger.error(f"bq tool error: {e}")
+        logger.error("bq tool error: %s", e)
         bq_res = []
 
     # Normalize to DataFrame for local analysis
@@ -53,7 +55,7 @@ def sequential_analysis(project_id, days, session_id="session-1"):
             (billing_df.usage_start_time >= cutoff)
             ].copy()
     except Exception as e:
-        logger.error(f"Error filtering billing data: {e}")
+        logger.error("Error filtering billing data: %s", e)
         # if billing_df not available or conversion fails, fall back to empty
         proj_df = bq_df.copy()
 
@@ -68,13 +70,34 @@ def sequential_analysis(project_id, days, session_id="session-1"):
         for r in detector_rows:
             if isinstance(r.get("usage_start_time"), (pd.Timestamp,)):
                 r["usage_start_time"] = str(r["usage_start_time"])
+    return detector_rows
 
-    # Step C: fetch monitoring metrics via local tool
+
+def known_spike_result(project_id, detector_rows):
+    """
+    Known-spike check run before any LLM call: if every locally detected spike in
+    detector_rows is already ticketed, return the existing tickets, else None.
+    """
     try:
-        mon_res = tools.monitoring_fetch_cpu(days)
+        candidates = correlation.candidate_spikes(detector_rows)
+        tickets = ticket_store.known_spike_tickets(project_id, candidates)
     except Exception as e:
-        logger.error(f"monitoring tool error: {e}")
-        mon_res = []
+        logger.error("known spike check error: %s", e)
+        return None
+    if not tickets:
+        return None
+
+    summary = "\n".join(
+        f"- {t['ticket_id']}: {t['title']} (spike on {t['spike_date']}, service {t['service']})" for t in tickets
+    )
+    text = f"All detected cost spikes for {project_id} are already ticketed:\n{summary}"
+    # same shape as runner events so the dashboard renders it unchanged
+    return {"agent_result": [{"content": {"parts": [{"text": text}]}}], "tickets": tickets, "known_spike": True}
+
+
+def sequential_analysis(project_id, days, session_id="session-1", detector_rows=None):
+    if detector_rows is None:
+        detector_rows = billing_rows_for_detector(project_id, days)
 
     # Build a compact prompt that instructs the parent agent to use the embedded spike_detector_tool and ticket_create
     # NOTE: We include detector_rows as a JSON string so the model sees a machine-readable payload.
@@ -82,7 +105,6 @@ def sequential_analysis(project_id, days, session_id="session-1"):
         "project_id": project_id,
         "days": days,
         "billing_rows_for_detector": detector_rows,
-        "recent_metrics_sample": mon_res
     }
 
     prompt = (
@@ -93,7 +115,8 @@ def sequential_analysis(project_id, days, session_id="session-1"):
             "     - The spike_detector_tool will return JSON: {\"spikes\": [...], \"reason\": \"...\"}.\n"
             "  2) If the detector returns spikes (non-empty list), CALL the tool named 'ticket_create' with a JSON payload:\n"
             "       {\"title\": \"Cost Spike detected for <project_id>\",\n"
-            "        \"body\": \"<short description of spikes and evidence (include usage_start_time & cost)>\"}\n"
+            "        \"body\": \"<short description of spikes and evidence (include usage_start_time & cost)>\",\n"
+            "        \"project_id\": \"<project_id>\", \"spike_date\": \"<usage_start_time of the spike>\", \"service\": \"<service of the spike>\"}\n"
             "  3) Regardless of ticket creation, explain the most likely cause of the cost spike. \n\n"
             "Then provide a prioritized list of safe remediation steps (non-destructive first). \n\n"
             "Also include one suggested follow-up action that requires human approval.\n\n"
@@ -120,11 +143,17 @@ async def run_analysis_with_agent(project_id: str, days: int = 30):
             app_name="Cloud Cost Anomaly Detection App",
             session_service=session_service,
             plugins=[
-                LoggingPlugin()
+                StructuredLoggingPlugin()
             ]
         )
 
-    prompt = sequential_analysis(project_id=project_id, days=days)
+    detector_rows = billing_rows_for_detector(project_id, days)
+    known = known_spike_result(project_id, detector_rows)
+    if known is not None:
+        logger.info("Returning existing tickets for %s without running the agent.", project_id)
+        return known
+
+    prompt = sequential_analysis(project_id=project_id, days=days, detector_rows=detector_rows)
     if prompt is None:
         logger.warning("No billing data — nothing to analyze.")
         return
@@ -135,4 +164,4 @@ async def run_analysis_with_agent(project_id: str, days: int = 30):
         agent_result = await runner.run_debug(prompt)
         return {"agent_result": agent_result}
     except Exception as e:
-        logger.error(f"Error running agent: {repr(e)}")
+        logger.error("Error running agent: %r", e)
@@ -46,9 +46,11 @@ def build_cloud_cost_agent():
             name="root_cause_agent",
             model=model,
             instruction=(
-                "You are a Root Cause Analyzer. INPUT: JSON object with keys: 'project_id', 'spikes', 'recent_metrics'.\n\n"
+                "You are a Root Cause Analyzer. INPUT: JSON object with keys: 'project_id', 'spike_dates', 'evidence'.\n"
+                "'evidence' is a list already ranked by a local correlation engine (highest score first).\n\n"
                 "TASK: Return ONLY a JSON object with keys: {\"root_causes\": [{\"cause\":\"...\", \"confidence\":0.0, \"evidence\":\"...\"}], \"recommendation\":\"short text\" }\n\n"
-                "Constraints: Output must be valid JSON, no extra prose. Provide at least one cause if spikes are non-empty."
+                "Constraints: Output must be valid JSON, no extra prose. Keep the given ranking and use each entry's score as confidence; "
+                "only phrase the causes. Provide at least one cause if spike_dates are non-empty."
             )
         )
 
@@ -71,26 +73,32 @@ def build_cloud_cost_agent():
             name="cloud_cost_agent",
             model=model,
             instruction=(
-                "You are cloud_cost_agent_ext. You will be given a JSON payload with billing rows and recent metrics.\n\n"
+                "You are cloud_cost_agent_ext. You will be given a JSON payload with billing rows.\n\n"
                 "RULES (read carefully):\n"
                 " - Use the exact tool names provided in the agent's tools list.\n"
                 " - When calling a tool, issue a single function_call with VALID JSON arguments only (no markdown/backticks).\n"
                 " - **Do not finish** immediately after any single tool responds. After a tool returns, CONTINUE reasoning and call the next tool(s) as needed.\n"
                 " - Your session should follow this explicit multi-step workflow:\n"
                 "     1) CALL spike_detector_agent with {\"rows\": billing_rows_for_detector}. Wait for its response.\n"
-                "     2) If there are spikes, CALL root_cause_agent with {\"project_id\":..., \"spikes\":<the spikes returned>, \"recent_metrics\": recent_metrics_sample} and wait for its response.\n"
-                "     3) If spikes exist, CALL ticket_create tool with a JSON payload {\"title\":..., \"body\":...} and wait for its response.\n"
+                "     2) If there are spikes, CALL correlate_spikes tool with {\"project_id\":..., \"spikes\":<the spikes returned>} and wait for its response.\n"
+                "        Then CALL root_cause_agent with the JSON returned by correlate_spikes and wait for its response.\n"
+                "     3) If spikes exist, CALL ticket_create tool with a JSON payload {\"title\":..., \"body\":..., \"project_id\":..., \"spike_date\":..., \"service\":...} for EACH spike and wait for each response.\n"
+                "        If the response has \"existing\": true the spike was already ticketed; report that ticket instead of a new one.\n"
                 "     4) CALL forecast_costs tool with a JSON payload {\"rows\": billing_rows_for_detector}. Wait for its response.\n"
+                "     5) CALL scan_idle_resources tool with {\"project_id\": ...} and include any idle or unattached resources and their estimated monthly savings.\n"
                 " - After all required tool calls and responses, produce a FINAL response in plain English.\n\n"
                 "Always follow the workflow above and always return the FINAL result at the end."
             ),
             tools=[
                 tools.bq_query_cost_by_project,
+                tools.query_costs,
                 tools.monitoring_fetch_cpu,
+                tools.correlate_spikes,
                 AgentTool(agent=spike_detector_agent),
                 AgentTool(agent=root_cause_agent),
                 tools.ticket_create,
-                tools.forecast_costs
+                tools.forecast_costs,
+                tools.scan_idle_resources
             ]
         )
         logger.info("------------- cloud_cost_agent created -------------")
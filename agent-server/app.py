@@ -1,15 +1,17 @@
 import logging
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from dotenv import load_dotenv
+import log_pipeline
 
 # Load env vars
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+log_pipeline.setup_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Cloud Cost Agent API")
@@ -27,19 +29,55 @@ class AgentRequest(BaseModel):
     project_id: str
     days: int = 30
 
+class CostQueryRequest(BaseModel):
+    group_by: List[str] = []
+    filters: Dict[str, Union[str, List[str]]] = {}
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    limit: Optional[int] = Field(None, ge=1, le=10000)
+
 # Import after configuring logging/env
 from agent_runner import run_analysis_with_agent
+import ticket_store
+import cost_query
+import asset_index
 
 @app.post("/run-agent")
 async def run_agent(req: AgentRequest):
-    logger.info(f"Received request for project: {req.project_id}, days: {req.days}")
+    logger.info("Received request for project: %s, days: %s", req.project_id, req.days)
     try:
         res = await run_analysis_with_agent(req.project_id, req.days)
         return res
     except Exception as e:
-        logger.error(f"Agent error: {e}")
+        logger.error("Agent error: %s", e)
         raise HTTPException(status_code=500, detail=f"agent error: {e}")
 
+@app.post("/costs/query")
+def query_costs(req: CostQueryRequest):
+    try:
+        rows = cost_query.query_costs(req.filters, req.group_by, req.start_date, req.end_date, req.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"rows": rows}
+
+@app.get("/waste")
+def scan_waste(project_id: Optional[str] = None, lookback_days: int = Query(14, ge=1, le=365),
+               limit: int = Query(100, ge=1, le=10000)):
+    return asset_index.scan_idle_resources(project_id, lookback_days, limit)
+
+@app.get("/tickets")
+def list_tickets(project_id: Optional[str] = None, service: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    return {"tickets": ticket_store.list_tickets(project_id, service, since, until, limit, offset)}
+
+@app.get("/tickets/{ticket_id}")
+def get_ticket(ticket_id: str):
+    ticket = ticket_store.get_ticket(ticket_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail=f"ticket not found: {ticket_id}")
+    return ticket
+
 # Optional: simple health check
 @app.get("/health")
 def health():
@@ -0,0 +1,163 @@
+"""
+Columnar asset inventory and idle-resource waste scanner.
+
+data_loader.assets_list is converted once per dataset into a DataFrame sorted by
+(project, type) with {project: (start, stop)} and {(project, type): (start, stop)} offsets,
+so per-project lookups are slices instead of list scans. scan_idle_resources joins that index
+with billing (via cost_query) and daily CPU metrics in one vectorized pass.
+"""
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import cost_query
+import data_loader
+
+logger = logging.getLogger(__name__)
+
+# asset types that cost money while detached
+UNATTACHED_TYPES = ("disk", "static-ip")
+# a VM is idle when its mean CPU over the lookback is below IDLE_CPU_MEAN and it never exceeds IDLE_CPU_PEAK
+IDLE_CPU_MEAN = 10.0
+IDLE_CPU_PEAK = 20.0
+LOOKBACK_DAYS = 14
+DAYS_PER_MONTH = 30
+
+_COLUMNS = ("id", "type", "project", "attached", "estimated_monthly_cost")
+
+_lock = threading.Lock()
+_index = {"source": None, "len": 0, "frame": None, "by_project": {}, "by_project_type": {}}
+
+
+def _group_offsets(frame: pd.DataFrame, cols: List[str]) -> dict:
+    """{key: (start, stop)} for runs of equal `cols` values in a frame already sorted by them."""
+    if frame.empty:
+        return {}
+    values = [frame[c].to_numpy() for c in cols]
+    changed = np.zeros(len(frame) - 1, dtype=bool)
+    for v in values:
+        changed |= v[1:] != v[:-1]
+    starts = np.concatenate([[0], np.flatnonzero(changed) + 1])
+    stops = np.concatenate([starts[1:], [len(frame)]])
+    keys = zip(*(v[starts] for v in values)) if len(cols) > 1 else values[0][starts]
+    return {k: (int(a), int(b)) for k, a, b in zip(keys, starts, stops)}
+
+
+def _build_index(assets: List[dict]) -> dict:
+    frame = pd.DataFrame(assets)
+    for col in _COLUMNS:
+        if col not in frame.columns:
+            frame[col] = np.nan
+    frame["id"] = frame["id"].astype(str)
+    frame["type"] = frame["type"].astype(str)
+    frame["project"] = frame["project"].astype(str)
+    frame["attached"] = frame["attached"].fillna(True).astype(bool)
+    frame["estimated_monthly_cost"] = pd.to_numeric(frame["estimated_monthly_cost"], errors="coerce")
+    frame = frame.sort_values(["project", "type"], kind="stable").reset_index(drop=True)
+    return {
+        "frame": frame,
+        "by_project": _group_offsets(frame, ["project"]),
+        "by_project_type": _group_offsets(frame, ["project", "type"]),
+    }
+
+
+def get_index() -> dict:
+    """Return the index for the current assets_list, rebuilding only when it changes."""
+    assets = data_loader.assets_list
+    with _lock:
+        if _index["source"] is not assets or _index["len"] != len(assets):
+            _index.update(source=assets, len=len(assets), **_build_index(assets))
+            logger.info("Asset index built: %d assets, %d projects", len(_index["frame"]), len(_index["by_project"]))
+        return _index
+
+
+def lookup(project: Optional[str] = None, asset_type: Optional[str] = None) -> pd.DataFrame:
+    """Assets for a project and/or type; project lookups are slices of the sorted frame."""
+    index = get_index()
+    frame = index["frame"]
+    if project is not None:
+        if asset_type is not None:
+            start, stop = index["by_project_type"].get((project, asset_type), (0, 0))
+        else:
+            start, stop = index["by_project"].get(project, (0, 0))
+        return frame.iloc[start:stop]
+    if asset_type is not None:
+        return frame[frame["type"].to_numpy() == asset_type]
+    return frame
+
+
+def _vm_cpu_stats(vm_ids: np.ndarray, lookback_days: int) -> pd.DataFrame:
+    cpu = data_loader.get_daily_cpu()
+    cols = [c for c in pd.unique(vm_ids) if c in cpu.columns]
+    if cpu.empty or not cols:
+        return pd.DataFrame(columns=["avg_cpu", "peak_cpu"], index=pd.Index([], dtype=object), dtype=float)
+    window = cpu.loc[cpu.index > cpu.index.max() - pd.Timedelta(days=lookback_days), cols]
+    return pd.DataFrame({"avg_cpu": window.mean(), "peak_cpu": window.max()})
+
+
+def _monthly_instance_cost(lookback_days: int) -> pd.DataFrame:
+    billing_df = data_loader.billing_df
+    if billing_df.empty or "instance" not in billing_df.columns:
+        return pd.DataFrame(columns=["id", "billed_monthly_cost"])
+    last_day = pd.to_datetime(billing_df["usage_start_time"]).max()
+    start = (last_day - pd.Timedelta(days=lookback_days - 1)).strftime("%Y-%m-%d")
+    # keyed on the instance alone: a VM is often billed to projects other than the one owning the asset
+    rows = cost_query.query_costs(group_by=["instance"], start_date=start)
+    costs = pd.DataFrame(rows, columns=["instance", "net_cost"])
+    return pd.DataFrame({
+        "id": costs["instance"],
+        "billed_monthly_cost": costs["net_cost"] / lookback_days * DAYS_PER_MONTH,
+    })
+
+
+def scan_idle_resources(project: Optional[str] = None, lookback_days: int = LOOKBACK_DAYS,
+                        limit: Optional[int] = None) -> dict:
+    """
+    Flag unattached disks / static IPs and idle VMs, optionally for one project.
+    Idle VMs are those whose daily CPU over the last `lookback_days` of metrics stays below
+    IDLE_CPU_MEAN on average and IDLE_CPU_PEAK at peak. Savings come from the asset's
+    estimated_monthly_cost, or for VMs from their billed net cost over the same lookback
+    (summed over every billing project) scaled to a month. Returns {"findings": [...], "count", "total_estimated_monthly_savings"},
+    findings ordered by savings descending; `limit` caps the findings list but not count or total.
+    """
+    assets = lookup(project=project or None)
+    empty = {"findings": [], "count": 0, "total_estimated_monthly_savings": 0.0}
+    if assets.empty:
+        return empty
+
+    unattached = assets[assets["type"].isin(UNATTACHED_TYPES) & ~assets["attached"]].copy()
+    unattached["reason"] = "unattached " + unattached["type"]
+    unattached["basis"] = "asset estimate"
+
+    vms = assets[assets["type"] == "vm"]
+    stats = _vm_cpu_stats(vms["id"].to_numpy(), lookback_days)
+    vms = vms.join(stats, on="id", how="inner")
+    idle = vms[(vms["avg_cpu"] < IDLE_CPU_MEAN) & (vms["peak_cpu"] < IDLE_CPU_PEAK)].copy()
+    if not idle.empty:
+        idle = idle.merge(_monthly_instance_cost(lookback_days), on="id", how="left")
+        billed = idle["billed_monthly_cost"].notna()
+        idle["estimated_monthly_cost"] = idle["billed_monthly_cost"].where(billed, idle["estimated_monthly_cost"])
+        idle["basis"] = np.where(billed, f"billed cost, last {lookback_days}d",
+                                 np.where(idle["estimated_monthly_cost"].notna(), "asset estimate", "no cost data"))
+        idle["reason"] = ("idle vm: avg cpu " + idle["avg_cpu"].round(1).astype(str)
+                          + "%, peak " + idle["peak_cpu"].round(1).astype(str) + "%")
+
+    findings = pd.concat([unattached, idle], ignore_index=True, sort=False)
+    if findings.empty:
+        return empty
+    findings["estimated_monthly_savings"] = findings["estimated_monthly_cost"].fillna(0.0).round(2)
+    findings = findings.sort_values("estimated_monthly_savings", ascending=False, kind="stable")
+    total = round(float(findings["estimated_monthly_savings"].sum()), 2)
+    count = len(findings)
+    if limit:
+        findings = findings.head(int(limit))
+
+    out_cols = ["id", "project", "type", "reason", "basis", "estimated_monthly_savings"]
+    records = findings[out_cols].rename(columns={"id": "asset_id"}).to_dict(orient="records")
+    for rec, avg in zip(records, findings.get("avg_cpu", pd.Series(np.nan, index=findings.index))):
+        if pd.notna(avg):
+            rec["avg_cpu"] = round(float(avg), 2)
+    return {"findings": records, "count": count, "total_estimated_monthly_savings": total}
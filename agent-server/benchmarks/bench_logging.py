@@ -0,0 +1,251 @@
+"""
+Request latency with logging off, the previous synchronous setup, and log_pipeline.
+
+Each request is a full agent_runner.run_analysis_with_agent call: billing rows for the
+detector, the known-spike check, prompt build and an agent run. The LLM is replaced by
+StubRunner, which replays one scripted agent turn through the runner plugin callbacks with
+real ADK content types and calls the real tools (correlate_spikes, ticket_create,
+forecast_costs, scan_idle_resources), so only the model latency is missing. Modes:
+- off:   no runner plugin, application logging at WARNING
+- sync:  google.adk LoggingPlugin (print()) plus a stdout StreamHandler, as before log_pipeline
+- async: StructuredLoggingPlugin through log_pipeline, listener thread writing a JSON log file
+
+The shipped data/ files end on a fixed date, so a fresh dataset ending today is generated
+into a temp directory; only projects with candidate spikes in their detector window are
+requested, so every request carries the full billing rows and creates tickets. Each round
+runs every mode (in rotated order) against its own ticket DB; the report gives per-mode
+medians across rounds and the paired per-round difference from "off". stdout is
+redirected to a file in the temp directory, which is removed at the end. The dataset is
+moved out of the cyclic GC (gc.freeze) after warm-up so collector pauses do not swamp the
+comparison.
+
+Run from agent-server/:  python benchmarks/bench_logging.py [requests per mode] [rounds]
+"""
+import gc
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events import Event
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.logging_plugin import LoggingPlugin
+from google.genai import types
+
+import agent_runner
+import correlation
+import data_loader
+import log_pipeline
+import ticket_store
+import tools
+from plugins import StructuredLoggingPlugin
+
+DAYS = 30
+MODES = ("off", "sync", "async")
+AGENT = "cloud_cost_agent"
+MODEL = "stub-model"
+SYSTEM_INSTRUCTION = "You are cloud_cost_agent_ext. " + "Follow the multi-step workflow. " * 60
+
+
+class StubRunner:
+    """Stands in for google.adk Runner: run_debug(prompt) drives `plugins` through one agent turn."""
+
+    def __init__(self, plugins):
+        self.plugins = plugins
+        self.requests = 0
+
+    async def _notify(self, callback, **kwargs):
+        for plugin in self.plugins:
+            await getattr(plugin, callback)(**kwargs)
+
+    def _tool_calls(self, payload):
+        project_id = payload["project_id"]
+        rows = payload["billing_rows_for_detector"]
+        spikes = correlation.candidate_spikes(rows)
+        calls = [("correlate_spikes", tools.correlate_spikes, {"project_id": project_id, "spikes": spikes})]
+        for s in spikes:
+            # unique service per request: every run inserts its ticket instead of short-circuiting the next one
+            calls.append(("ticket_create", tools.ticket_create, {
+                "title": f"Cost Spike detected for {project_id}",
+                "body": f"Spike of {s['cost']} on {s['usage_start_time']}",
+                "project_id": project_id,
+                "spike_date": s["usage_start_time"],
+                "service": f"{s.get('service', '')}-bench-{self.requests}",
+            }))
+        calls.append(("forecast_costs", tools.forecast_costs, {"params": {"rows": rows}}))
+        calls.append(("scan_idle_resources", tools.scan_idle_resources, {"project_id": project_id}))
+        return calls
+
+    async def _event(self, ctx, content):
+        event = Event(author=AGENT, invocation_id=ctx.invocation_id, content=content)
+        await self._notify("on_event_callback", invocation_context=ctx, event=event)
+        return event
+
+    async def _model_call(self, ctx, cb_ctx, contents, response_part):
+        request = LlmRequest(model=MODEL, contents=list(contents),
+                             config=types.GenerateContentConfig(system_instruction=SYSTEM_INSTRUCTION))
+        request.tools_dict = {name: None for name in ("correlate_spikes", "ticket_create", "forecast_costs",
+                                                       "scan_idle_resources")}
+        await self._notify("before_model_callback", callback_context=cb_ctx, llm_request=request)
+        content = types.Content(role="model", parts=[response_part])
+        response = LlmResponse(content=content, usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=len(str(contents)) // 4, candidates_token_count=50))
+        await self._notify("after_model_callback", callback_context=cb_ctx, llm_response=response)
+        return content
+
+    async def run_debug(self, prompt):
+        self.requests += 1
+        payload = json.loads(prompt.split("Payload:\n", 1)[1])
+        ctx = SimpleNamespace(invocation_id=f"e-{uuid.uuid4()}", session=SimpleNamespace(id="debug_session_id"),
+                              user_id="debug_user_id", app_name="bench", agent=SimpleNamespace(name=AGENT),
+                              branch=None)
+        cb_ctx = SimpleNamespace(agent_name=AGENT, invocation_id=ctx.invocation_id, _invocation_context=ctx)
+        user_message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        contents = [user_message]
+        events = []
+
+        await self._notify("on_user_message_callback", invocation_context=ctx, user_message=user_message)
+        await self._notify("before_run_callback", invocation_context=ctx)
+        await self._notify("before_agent_callback", agent=ctx.agent, callback_context=cb_ctx)
+        for i, (name, fn, args) in enumerate(self._tool_calls(payload)):
+            call = types.FunctionCall(id=f"call-{i}", name=name, args=args)
+            contents.append(await self._model_call(ctx, cb_ctx, contents, types.Part(function_call=call)))
+            events.append(await self._event(ctx, contents[-1]))
+
+            tool = SimpleNamespace(name=name)
+            tool_ctx = SimpleNamespace(agent_name=AGENT, function_call_id=call.id)
+            await self._notify("before_tool_callback", tool=tool, tool_args=args, tool_context=tool_ctx)
+            result = fn(**args)
+            result = result if isinstance(result, dict) else {"result": result}
+            await self._notify("after_tool_callback", tool=tool, tool_args=args, tool_context=tool_ctx,
+                               result=result)
+            reply = types.FunctionResponse(id=call.id, name=name, response=result)
+            contents.append(types.Content(role="user", parts=[types.Part(function_response=reply)]))
+            events.append(await self._event(ctx, contents[-1]))
+
+        final = await self._model_call(ctx, cb_ctx, contents, types.Part(text="Summary of spikes, causes and tickets."))
+        events.append(await self._event(ctx, final))
+        await self._notify("after_agent_callback", agent=ctx.agent, callback_context=cb_ctx)
+        await self._notify("after_run_callback", invocation_context=ctx)
+        return events
+
+
+def spiky_projects(days):
+    """Projects whose detector rows hold at least one candidate spike, with their mean prompt size."""
+    projects, prompt_chars, spikes = [], [], 0
+    for project_id in sorted(data_loader.billing_df["project_id"].unique()):
+        rows = agent_runner.billing_rows_for_detector(project_id, days)
+        found = correlation.candidate_spikes(rows)
+        if rows and found:
+            projects.append(project_id)
+            prompt_chars.append(len(agent_runner.sequential_analysis(project_id, days, detector_rows=rows)))
+            spikes += len(found)
+    assert projects, "no project has spikes in its detector window; the benchmark would time empty requests"
+    return projects, statistics.mean(prompt_chars), spikes / len(projects)
+
+
+async def measure(plugins, projects, n, db_path):
+    """Per-request wall times of run_analysis_with_agent in ms, sorted. Each run gets a fresh ticket DB."""
+    ticket_store.DB_PATH = db_path
+    agent_runner.runner = StubRunner(plugins)
+    samples = []
+    for i in range(n):
+        t = time.perf_counter()
+        result = await agent_runner.run_analysis_with_agent(projects[i % len(projects)], DAYS)
+        samples.append((time.perf_counter() - t) * 1000)
+        assert result and "agent_result" in result and not result.get("known_spike"), result
+    return sorted(samples)
+
+
+def run_mode(mode, projects, n, tmp, round_no, out):
+    """One timed run of `mode`; returns (sorted samples, bytes of log output)."""
+    root = logging.getLogger()
+    db_path = os.path.join(tmp, f"tickets-{mode}-{round_no}.db")
+    if mode == "off":
+        root.setLevel(logging.WARNING)
+        return asyncio.run(measure([], projects, n, db_path)), 0
+    if mode == "sync":
+        handler = logging.StreamHandler(out)
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] [%(name)s] %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        start = out.tell()
+        try:
+            samples = asyncio.run(measure([LoggingPlugin()], projects, n, db_path))
+        finally:
+            root.removeHandler(handler)
+        return samples, out.tell() - start
+    log_file = os.path.join(tmp, f"async-{round_no}.log")
+    log_pipeline.setup_logging(level="INFO", log_file=log_file, console=False)
+    try:
+        samples = asyncio.run(measure([StructuredLoggingPlugin()], projects, n, db_path))
+    finally:
+        log_pipeline.shutdown_logging()
+    return samples, sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)
+                        if f.startswith(f"async-{round_no}.log"))
+
+
+def main(n=100, rounds=5):
+    os.environ.setdefault("GOOGLE_API_KEY", "unused")  # the stub runner never calls the model
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.setLevel(logging.WARNING)
+
+    tmp = tempfile.mkdtemp()
+    # the shipped data/ CSV ends on a fixed date, so the "last DAYS days" window of
+    # run_analysis_with_agent would be empty; generate a fresh dataset ending today instead
+    data_dir = os.path.join(tmp, "data")
+    os.makedirs(data_dir)
+    data_loader.DATA_DIR = Path(data_dir)
+    data_loader.BILLING_CSV = data_loader.DATA_DIR / "synthetic_billing.csv"
+    data_loader.METRICS_JSONL = data_loader.DATA_DIR / "synthetic_metrics.jsonl"
+    data_loader.ASSETS_JSON = data_loader.DATA_DIR / "assets.json"
+
+    medians = {m: [] for m in MODES}
+    p95s = {m: [] for m in MODES}
+    volume = {m: [] for m in MODES}
+    try:
+        with open(os.path.join(tmp, "stdout.log"), "w") as out, redirect_stdout(out):
+            data_loader.load_or_generate_data(True)
+            projects, prompt_chars, spikes = spiky_projects(DAYS)
+            # warm-up: cost cube, asset index and CPU frame are built once per dataset
+            asyncio.run(measure([], projects, len(projects), os.path.join(tmp, "warmup.db")))
+            # keep the loaded dataset (millions of small objects) out of the cyclic GC: full
+            # collections over it take ~400 ms and would dominate p95 in every mode alike
+            gc.collect()
+            gc.freeze()
+            for r in range(rounds):
+                # rotate the mode order so drift over the run does not favour one mode
+                for mode in MODES[r % len(MODES):] + MODES[:r % len(MODES)]:
+                    samples, size = run_mode(mode, projects, n, tmp, r, out)
+                    medians[mode].append(statistics.median(samples))
+                    p95s[mode].append(samples[max(int(len(samples) * 0.95) - 1, 0)])
+                    volume[mode].append(size / n)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{rounds} rounds x {n} requests per mode over {len(projects)} projects with spikes")
+    print(f"prompt ~{prompt_chars / 1e3:.1f} KB, {spikes:.1f} spike(s) / ticket_create call(s) per request")
+    print(f"{'mode':<6} {'median ms':>10} {'p95 ms':>9} {'vs off (median, min..max over rounds)':>40} {'log KB/req':>11}")
+    for mode in MODES:
+        overhead = [m - o for m, o in zip(medians[mode], medians["off"])]
+        spread = f"{statistics.median(overhead):+.2f} ({min(overhead):+.2f}..{max(overhead):+.2f})"
+        print(f"{mode:<6} {statistics.median(medians[mode]):10.2f} {statistics.median(p95s[mode]):9.2f} "
+              f"{spread:>40} {statistics.median(volume[mode]) / 1e3:11.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,192 @@
+"""
+Local billing <-> metrics correlation engine.
+
+For each detected billing spike of a project, scores candidate causes with NumPy:
+- CPU series of the instances the project bills against (from synthetic_metrics.jsonl),
+  using lagged Pearson correlation and spike-day co-occurrence.
+- Known scheduled anomaly patterns produced by data_generator (see known_anomaly_flags).
+
+The result is a short ranked evidence list, so root_cause_agent only has to phrase it.
+"""
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+import data_generator as dg
+import data_loader
+
+logger = logging.getLogger(__name__)
+
+# lags (in days) where the candidate signal may lead the billed cost
+MAX_LAG_DAYS = 2
+# a CPU day counts as "elevated" above this z-score
+CPU_Z_THRESHOLD = 1.5
+# modified z-score above which candidate_spikes flags a billing row
+SPIKE_Z_THRESHOLD = 3.5
+# weight of co-occurrence vs correlation in the final score
+CO_OCCURRENCE_WEIGHT = 0.6
+
+def _project_number(project_id: str):
+    try:
+        return int(str(project_id).rsplit("-", 1)[-1])
+    except ValueError:
+        return None
+
+
+def _zscore(x: np.ndarray) -> np.ndarray:
+    """Column-wise z-score; constant columns become all-zero."""
+    mu = np.nanmean(x, axis=0)
+    sd = np.nanstd(x, axis=0)
+    sd = np.where(sd > 0, sd, 1.0)
+    return np.nan_to_num((x - mu) / sd)
+
+
+def _lagged_corr(y: np.ndarray, X: np.ndarray, max_lag: int):
+    """
+    Pearson correlation of y[t] against every column of X[t - lag] for lag in 0..max_lag.
+    Returns (best_corr, best_lag) arrays, one entry per column of X.
+    """
+    n, k = X.shape
+    corr = np.zeros((max_lag + 1, k))
+    for lag in range(max_lag + 1):
+        if n - lag < 3:
+            break
+        ys = _zscore(y[lag:, None])
+        xs = _zscore(X[:n - lag])
+        corr[lag] = (ys * xs).mean(axis=0)
+    best_lag = np.argmax(corr, axis=0)
+    return corr[best_lag, np.arange(k)], best_lag
+
+
+def _co_occurrence(spike_idx: np.ndarray, hits: np.ndarray, max_lag: int):
+    """
+    Fraction of spike days where a column of `hits` (bool, date x signal) is set on the
+    spike day or up to max_lag days before it. Also returns the matched spike count.
+    """
+    window = np.zeros((len(spike_idx), hits.shape[1]), dtype=bool)
+    for lag in range(max_lag + 1):
+        idx = spike_idx - lag
+        valid = idx >= 0
+        window[valid] |= hits[idx[valid]]
+    matched = window.sum(axis=0)
+    return matched / max(len(spike_idx), 1), matched
+
+
+def candidate_spikes(rows: List[dict], threshold: float = SPIKE_Z_THRESHOLD) -> List[dict]:
+    """
+    Cheap local pre-check for spikes in billing rows (usage_start_time, cost[, service]):
+    rows whose robust z-score (median / MAD) of cost exceeds `threshold`.
+    Used to look up already-ticketed spikes before any LLM call; not a replacement
+    for spike_detector_agent.
+    """
+    if len(rows) < 5:
+        return []
+    cost = np.array([float(r.get("cost") or 0.0) for r in rows])
+    med = np.median(cost)
+    mad = np.median(np.abs(cost - med))
+    if mad == 0:
+        return []
+    z = 0.6745 * (cost - med) / mad
+    return [rows[i] for i in np.flatnonzero(z > threshold)]
+
+
+def rank_root_causes(project_id: str, spikes: List[dict], top_k: int = 3, max_lag: int = MAX_LAG_DAYS):
+    """
+    Rank candidate causes for the given billing spikes of project_id.
+    `spikes` are rows with at least 'usage_start_time' (as returned by the spike detector).
+    Returns {"project_id", "spike_dates", "evidence": [...]} with at most top_k entries,
+    highest score first.
+    """
+    result = {"project_id": project_id, "spike_dates": [], "evidence": []}
+    billing_df = data_loader.billing_df
+    if billing_df.empty or not spikes:
+        return result
+
+    proj = billing_df[billing_df["project_id"] == project_id]
+    if proj.empty:
+        return result
+
+    dates = pd.to_datetime(proj["usage_start_time"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    cost = proj["cost"].groupby(dates.dt.normalize()).sum().sort_index()
+    # reindex onto a contiguous calendar so lags are in days
+    calendar = pd.date_range(cost.index.min(), cost.index.max(), freq="D")
+    cost = cost.reindex(calendar, fill_value=0.0)
+    y = cost.to_numpy(dtype=float)
+
+    spike_dates = pd.to_datetime(
+        [s.get("usage_start_time") for s in spikes if isinstance(s, dict) and s.get("usage_start_time")],
+        errors="coerce", format="mixed",
+    )
+    spike_dates = pd.DatetimeIndex(spike_dates.dropna())
+    if spike_dates.tz is not None:
+        spike_dates = spike_dates.tz_convert(None)
+    spike_dates = spike_dates.normalize().unique()
+    spike_idx = calendar.get_indexer(spike_dates)
+    spike_idx = spike_idx[spike_idx >= 0]
+    result["spike_dates"] = [d.strftime("%Y-%m-%d") for d in calendar[spike_idx]]
+    if len(spike_idx) == 0:
+        return result
+
+    names, kinds, signals, hits = [], [], [], []
+
+    # candidate 1: CPU of the instances this project bills against
+    cpu = data_loader.get_daily_cpu()
+    instances = [i for i in proj.get("instance", pd.Series(dtype=str)).dropna().unique() if i in cpu.columns]
+    if instances:
+        cpu_m = cpu.reindex(calendar)[instances].to_numpy(dtype=float)
+        cpu_m = np.where(np.isnan(cpu_m), np.nanmean(cpu_m, axis=0), cpu_m)
+        names += [f"cpu:{i}" for i in instances]
+        kinds += ["metric"] * len(instances)
+        signals.append(cpu_m)
+        hits.append(_zscore(cpu_m) > CPU_Z_THRESHOLD)
+
+    # candidate 2: known scheduled patterns from data_generator
+    p = _project_number(project_id)
+    if p is not None:
+        global_start = pd.to_datetime(billing_df["usage_start_time"]).min()
+        if getattr(global_start, "tzinfo", None) is not None:
+            global_start = global_start.tz_convert(None)
+        flags = dg.known_anomaly_flags(calendar, p, start=global_start)
+        flags = {k: v for k, v in flags.items() if v.any()}
+        if flags:
+            pattern_m = np.column_stack(list(flags.values()))
+            names += [f"pattern:{k}" for k in flags]
+            kinds += ["pattern"] * len(flags)
+            signals.append(pattern_m.astype(float))
+            hits.append(pattern_m)
+
+    if not signals:
+        return result
+
+    X = np.hstack(signals)
+    H = np.hstack(hits)
+    corr, lag = _lagged_corr(y, X, max_lag)
+    co_occ, matched = _co_occurrence(spike_idx, H, max_lag)
+    score = CO_OCCURRENCE_WEIGHT * co_occ + (1 - CO_OCCURRENCE_WEIGHT) * np.clip(corr, 0.0, 1.0)
+
+    order = np.argsort(-score, kind="stable")[:top_k]
+    n_spikes = len(spike_idx)
+    for j in order:
+        if score[j] <= 0:
+            continue
+        kind, name = kinds[j], names[j].split(":", 1)[1]
+        if kind == "metric":
+            evidence = (f"CPU on {name} elevated on {matched[j]}/{n_spikes} spike days; "
+                        f"cost vs CPU r={corr[j]:.2f} at lag {lag[j]}d")
+        else:
+            evidence = (f"{matched[j]}/{n_spikes} spike days match scheduled pattern '{name}'; "
+                        f"r={corr[j]:.2f}")
+        result["evidence"].append({
+            "cause": names[j],
+            "kind": kind,
+            "score": round(float(score[j]), 3),
+            "correlation": round(float(corr[j]), 3),
+            "lag_days": int(lag[j]),
+            "co_occurrence": round(float(co_occ[j]), 3),
+            "evidence": evidence,
+        })
+    return result
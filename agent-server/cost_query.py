@@ -0,0 +1,199 @@
+"""
+Multi-dimension cost query engine over data_loader.billing_df.
+
+billing_df is compacted once per dataset into a columnar cube: one row per
+(day, project_id, service, region, sku, instance) with summed cost/credits, and every
+dimension dictionary-encoded as integer codes. Queries push their filters and date range
+down to those code arrays before grouping the distinct key tuples and summing with
+np.bincount, and results are cached until billing_df is replaced. Rows without a
+parseable usage_start_time are left out of the cube.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("project_id", "service", "region", "sku", "instance")
+# "date" groups by usage day; it is not filterable (use start_date / end_date)
+GROUP_BY_DIMENSIONS = DIMENSIONS + ("date",)
+RESULT_CACHE_SIZE = 256
+
+_lock = threading.Lock()
+_cube = {"source": None, "data": None}
+_results: "OrderedDict[tuple, List[dict]]" = OrderedDict()
+
+
+def _group_rows(keys: np.ndarray):
+    """
+    Distinct rows of an (n, k) int64 key matrix and the group index of every input row.
+    Works on the key tuples directly, so it cannot overflow however large the dimensions are.
+    """
+    groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+    return groups, inverse.reshape(-1)
+
+
+def _build_cube(billing_df: pd.DataFrame) -> dict:
+    dates = pd.to_datetime(billing_df["usage_start_time"], errors="coerce")
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    # rows without a usable date can never match a date range; drop them like the old pandas filter did
+    valid = dates.notna().to_numpy()
+    billing_df = billing_df[valid]
+    day = dates[valid].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    dims = [d for d in DIMENSIONS if d in billing_df.columns]
+    categories, codes = {}, []
+    for d in dims:
+        cat = pd.Categorical(billing_df[d].astype(str))
+        categories[d] = cat.categories
+        codes.append(cat.codes.astype(np.int64))
+
+    cost = billing_df["cost"].to_numpy(dtype=float)
+    credits = (billing_df["credits"].to_numpy(dtype=float) if "credits" in billing_df.columns
+               else np.zeros(len(billing_df)))
+
+    # pre-aggregate duplicate (day, dims...) rows into a single cube cell
+    cells, inverse = _group_rows(np.column_stack([day] + codes))
+
+    return {
+        "dims": dims,
+        "categories": categories,
+        "day": cells[:, 0],
+        "codes": {d: cells[:, i + 1] for i, d in enumerate(dims)},
+        "cost": np.bincount(inverse, weights=cost, minlength=len(cells)),
+        "credits": np.bincount(inverse, weights=credits, minlength=len(cells)),
+        "rows": len(billing_df),
+    }
+
+
+def _get_cube() -> Optional[dict]:
+    billing_df = data_loader.billing_df
+    if billing_df is None or billing_df.empty:
+        return None
+    with _lock:
+        if _cube["source"] is not billing_df:
+            _cube["data"] = _build_cube(billing_df)
+            _cube["source"] = billing_df
+            _results.clear()
+            logger.info("Cost cube built: %d billing rows -> %d cells", _cube["data"]["rows"], len(_cube["data"]["cost"]))
+        return _cube["data"]
+
+
+def _to_day(value) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return int(np.datetime64(ts.normalize(), "D").astype(np.int64))
+
+
+def _normalize_filters(filters: Optional[Dict[str, Union[str, List[str]]]]) -> tuple:
+    out = []
+    for dim, values in (filters or {}).items():
+        if dim not in DIMENSIONS:
+            raise ValueError(f"unknown filter dimension: {dim} (expected one of {', '.join(DIMENSIONS)})")
+        if isinstance(values, (str, int, float)):
+            values = [values]
+        out.append((dim, tuple(sorted(str(v) for v in values))))
+    return tuple(sorted(out))
+
+
+def query_costs(filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+                group_by: Optional[List[str]] = None,
+                start_date: Optional[str] = None,
+                end_date: Optional[str] = None,
+                limit: Optional[int] = None) -> List[dict]:
+    """
+    Aggregate billing cost by `group_by` dimensions after applying `filters`
+    ({dimension: value or [values]}) and an inclusive [start_date, end_date] day range.
+    Each result row has the group-by values plus cost, credits and net_cost (cost - credits).
+    Rows are ordered by date when grouping by date, otherwise by cost descending.
+    Raises ValueError for unknown dimensions or a non-positive limit.
+    """
+    group_by = list(group_by or [])
+    for g in group_by:
+        if g not in GROUP_BY_DIMENSIONS:
+            raise ValueError(f"unknown group_by dimension: {g} (expected one of {', '.join(GROUP_BY_DIMENSIONS)})")
+    if limit is not None:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(f"limit must be a positive integer, got {limit}")
+    norm_filters = _normalize_filters(filters)
+    start_day, end_day = _to_day(start_date), _to_day(end_date)
+
+    cube = _get_cube()
+    if cube is None:
+        return []
+
+    key = (norm_filters, tuple(group_by), start_day, end_day, limit)
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return [dict(r) for r in _results[key]]
+
+    rows = _run_query(cube, norm_filters, group_by, start_day, end_day, limit)
+
+    with _lock:
+        if _cube["data"] is cube:
+            _results[key] = rows
+            if len(_results) > RESULT_CACHE_SIZE:
+                _results.popitem(last=False)
+    return [dict(r) for r in rows]
+
+
+def _run_query(cube, filters, group_by, start_day, end_day, limit) -> List[dict]:
+    # filter pushdown: build the row mask on the encoded columns before any aggregation
+    mask = np.ones(len(cube["cost"]), dtype=bool)
+    if start_day is not None:
+        mask &= cube["day"] >= start_day
+    if end_day is not None:
+        mask &= cube["day"] <= end_day
+    for dim, values in filters:
+        if dim not in cube["categories"]:
+            return []
+        wanted = cube["categories"][dim].get_indexer(list(values))
+        mask &= np.isin(cube["codes"][dim], wanted[wanted >= 0])
+    for g in group_by:
+        if g != "date" and g not in cube["categories"]:
+            return []
+
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return []
+
+    key_arrays = [cube["day"][idx] if g == "date" else cube["codes"][g][idx] for g in group_by]
+    if key_arrays:
+        groups, inverse = _group_rows(np.column_stack(key_arrays))
+    else:
+        groups, inverse = np.zeros((1, 0), dtype=np.int64), np.zeros(len(idx), dtype=np.int64)
+    cost = np.bincount(inverse, weights=cube["cost"][idx], minlength=len(groups))
+    credits = np.bincount(inverse, weights=cube["credits"][idx], minlength=len(groups))
+
+    if "date" in group_by:
+        order = np.lexsort((-cost, groups[:, group_by.index("date")]))
+    else:
+        order = np.argsort(-cost, kind="stable")
+    if limit is not None:
+        order = order[:limit]
+
+    rows = []
+    for i in order:
+        row = {}
+        for j, g in enumerate(group_by):
+            if g == "date":
+                row[g] = str(np.datetime64(int(groups[i, j]), "D"))
+            else:
+                row[g] = str(cube["categories"][g][groups[i, j]])
+        row["cost"] = round(float(cost[i]), 2)
+        row["credits"] = round(float(credits[i]), 2)
+        row["net_cost"] = round(float(cost[i] - credits[i]), 2)
+        rows.append(row)
+    return rows
@@ -3,6 +3,7 @@ Synthetic data generator helpers for cloud cost experiments.
 
 Functions:
 - set_seed(seed)
+- known_anomaly_flags(dates, p, start=None)
 - gen_billing_csv(days=365, projects=30, out_path="data/synthetic_billing.csv")
 - gen_metrics_jsonl(days=365, out_path="data/synthetic_metrics.jsonl")
 - gen_assets_json(out_path="data/assets.json")
@@ -35,6 +36,37 @@ def project_metadata(p):
     inst = instances[(p-1) % len(instances)]
     return svc, inst
 
+# scheduled anomaly rules, shared by gen_billing_csv and known_anomaly_flags;
+# d is the day offset from the first generated day, day_of_year the calendar day (ints or arrays)
+BATCH_SERVICE = "Dataflow"
+
+def is_release_spike_day(d, p):
+    # every 90 days, offset by project, a release/test cost spike
+    return d % 90 == (p % 7)
+
+def is_monthly_batch_day(day_of_year, p):
+    # scheduled monthly batch job (large only for BATCH_SERVICE projects)
+    return (day_of_year + p) % 30 == 0
+
+# helper: boolean masks of the scheduled anomalies gen_billing_csv injects for project p
+def known_anomaly_flags(dates, p, start=None):
+    """
+    Deterministic anomaly rules of gen_billing_csv for project number p.
+    `dates` is any sequence of day timestamps; `start` is the first generated day
+    (defaults to min(dates)). Returns {pattern_name: np.ndarray[bool]} aligned to dates.
+    Random incidents are not reproducible and are therefore not included.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    start = pd.Timestamp(start).normalize() if start is not None else dates.min()
+    svc, _ = project_metadata(p)
+    day_of_year = np.asarray(dates.dayofyear)
+    d = np.asarray((dates - start).days)
+
+    flags = {"release_spike_every_90_days": is_release_spike_day(d, p)}
+    if svc == BATCH_SERVICE:
+        flags["monthly_dataflow_batch"] = is_monthly_batch_day(day_of_year, p)
+    return flags
+
 # --- billing CSV (365 days, 30 projects, with seasonal patterns and specific anomalies) ---
 def gen_billing_csv(days=365, projects=30, out_path=OUT_DIR + "/synthetic_billing.csv"):
     rows = []
@@ -74,17 +106,17 @@ def gen_billing_csv(days=365, projects=30, out_path=OUT_DIR + "/synthetic_billin
 
             # Occasionally inject "explainable" anomalies:
             # - scheduled monthly batch job: day_of_year % 30 == project_mod triggers increased Dataflow/Compute usage
-            proj_mod_trigger = (day_of_year + p) % 30 == 0
+            proj_mod_trigger = is_monthly_batch_day(day_of_year, p)
             # - randomized incident windows for some projects (more realistic than fixed periodic)
             incident_chance = 0.002  # low probability per project/day
             incident_happens = random.random() < incident_chance
 
             # Large anomaly for specific rule: if Dataflow project and a monthly batch triggers
             anomaly = 0.0
-            if svc == "Dataflow" and proj_mod_trigger:
+            if svc == BATCH_SERVICE and proj_mod_trigger:
                 anomaly += service_base * scale * 8.0  # large batch job cost
             # Another anomaly pattern: every 90 days, some projects (p%7==0) have a cost spike (e.g., release/test)
-            if d % 90 == (p % 7):
+            if is_release_spike_day(d, p):
                 anomaly += service_base * scale * 6.0
 
             # random incident
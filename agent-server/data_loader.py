@@ -1,7 +1,7 @@
 import json
 import pandas as pd
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 import data_generator as dg
 import logging
 
@@ -18,13 +18,22 @@ ASSETS_JSON = DATA_DIR / "assets.json"
 billing_df: pd.DataFrame = pd.DataFrame()
 metrics_list: List[dict] = []
 assets_list: List[dict] = []
+# daily mean CPU per instance, derived from metrics_list on first use
+_daily_cpu = {"source": None, "len": 0, "frame": None}
+# (mtime_ns, size) of each data file at last load; derived caches key off the loaded objects
+dataset_version: Optional[tuple] = None
 
-def load_or_generate_data(generate_if_missing: bool = True):
+def _files_version():
+    return tuple((p.stat().st_mtime_ns, p.stat().st_size) for p in (BILLING_CSV, METRICS_JSONL, ASSETS_JSON))
+
+def load_or_generate_data(generate_if_missing: bool = True, force_reload: bool = False):
     """
     Loads data from ./data; if any file is missing and generate_if_missing True,
     generate all files with data_generator.generate_all().
+    Files that are unchanged since the last load are not re-read unless force_reload is set,
+    so billing_df (and caches built on it) stay valid across requests.
     """
-    global billing_df, metrics_list, assets_list
+    global billing_df, metrics_list, assets_list, dataset_version
 
     missing = []
     for path in (BILLING_CSV, METRICS_JSONL, ASSETS_JSON):
@@ -38,6 +47,10 @@ def load_or_generate_data(generate_if_missing: bool = True):
         else:
             raise FileNotFoundError(f"Missing data files: {missing}")
 
+    version = _files_version()
+    if not force_reload and version == dataset_version and not billing_df.empty:
+        return
+
     # load billing as DataFrame
     billing_df = pd.read_csv(BILLING_CSV, parse_dates=["usage_start_time"])
     # load metrics as list of dicts
@@ -46,11 +59,12 @@ def load_or_generate_data(generate_if_missing: bool = True):
     # assets
     with open(ASSETS_JSON, "r") as f:
         assets_list = json.load(f)
+    dataset_version = version
 
     logger.info("Loaded data:")
-    logger.info(f" - billing rows: {len(billing_df)}")
-    logger.info(f" - metrics lines: {len(metrics_list)}")
-    logger.info(f" - assets: {len(assets_list)}")
+    logger.info(" - billing rows: %d", len(billing_df))
+    logger.info(" - metrics lines: %d", len(metrics_list))
+    logger.info(" - assets: %d", len(assets_list))
 
 def get_billing_df():
     return billing_df
@@ -60,3 +74,21 @@ def get_metrics_list():
 
 def get_assets_list():
     return assets_list
+
+def get_daily_cpu() -> pd.DataFrame:
+    """
+    Daily mean cpu_util as a DataFrame indexed by naive date with one column per instance.
+    Cached until metrics_list is replaced or grows.
+    """
+    if _daily_cpu["source"] is metrics_list and _daily_cpu["len"] == len(metrics_list):
+        return _daily_cpu["frame"]
+
+    frame = pd.DataFrame()
+    if metrics_list:
+        m = pd.DataFrame(metrics_list)
+        if {"timestamp", "instance", "cpu_util"}.issubset(m.columns):
+            m["date"] = pd.to_datetime(m["timestamp"]).dt.tz_localize(None).dt.normalize()
+            frame = m.pivot_table(index="date", columns="instance", values="cpu_util", aggfunc="mean")
+
+    _daily_cpu.update(source=metrics_list, len=len(metrics_list), frame=frame)
+    return frame
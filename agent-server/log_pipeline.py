@@ -0,0 +1,218 @@
+"""
+Non-blocking structured logging pipeline.
+
+Loggers hand records to a bounded in-memory queue; a QueueListener thread does all
+message formatting, JSON serialization, payload truncation and I/O. Request code only
+pays for creating the LogRecord. Records are not formatted before they are queued, so
+pass arguments lazily (logger.info("x=%s", x)) and do not mutate payloads after logging.
+
+Structured events go through log_event(logger, "event_type", "message", payload={...});
+per-event-type sampling drops records before they are queued. WARNING and above are
+never sampled out.
+
+Environment:
+- LOG_LEVEL             root level (default INFO)
+- LOG_FILE              optional path for a rotating JSON log file
+- LOG_PAYLOAD_MAX_CHARS max characters kept per string in message/payload (default 2000)
+- LOG_SAMPLE_RATES      comma separated event=rate overrides, e.g. "model_request=0.1,event=0"
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+QUEUE_SIZE = 10000
+PAYLOAD_MAX_CHARS = 2000
+PAYLOAD_MAX_ITEMS = 50
+
+# fraction of records kept per event type; event types not listed are always kept
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {
+    "model_request": 0.2,
+    "model_response": 0.2,
+    "event": 0.1,
+}
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_handler: Optional["AsyncQueueHandler"] = None
+_sampler: Optional["SamplingFilter"] = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        event, rate = item.split("=", 1)
+        try:
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+def truncate(value, max_chars: int = PAYLOAD_MAX_CHARS, max_items: int = PAYLOAD_MAX_ITEMS, _depth: int = 0):
+    """Return a JSON-safe copy of value with long strings and collections cut down."""
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}...(+{len(value) - max_chars} chars)"
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if _depth >= 4:
+        return truncate(repr(value), max_chars)
+    if isinstance(value, dict):
+        items = list(value.items())
+        out = {str(k): truncate(v, max_chars, max_items, _depth + 1) for k, v in items[:max_items]}
+        if len(items) > max_items:
+            out["..."] = f"+{len(items) - max_items} keys"
+        return out
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        out = [truncate(v, max_chars, max_items, _depth + 1) for v in items[:max_items]]
+        if len(items) > max_items:
+            out.append(f"...(+{len(items) - max_items} items)")
+        return out
+    return truncate(str(value), max_chars)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, event and any extra fields."""
+
+    def __init__(self, max_chars: int = PAYLOAD_MAX_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage(), self.max_chars),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                out[key] = truncate(value, self.max_chars)
+        if record.exc_info:
+            out["exc"] = truncate(self.formatException(record.exc_info), self.max_chars * 4)
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a `rates[event]` fraction of records carrying an `event` attribute."""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def keep(self, event: Optional[str], level: int) -> bool:
+        if level >= logging.WARNING:
+            return True
+        rate = self.rates.get(event, 1.0)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # log_event already sampled before creating the record
+        if getattr(record, "_sampled", False):
+            return True
+        return self.keep(getattr(record, "event", None), record.levelno)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler that defers formatting to the listener thread and never blocks:
+    when the queue is full the record is dropped and counted in `dropped`.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # in-process queue: no need to pre-format or pickle the record
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def log_event(logger: logging.Logger, event: str, msg: str, *args, payload=None, level: int = logging.INFO):
+    """
+    Emit a structured record of type `event`; payload is serialized off the request path.
+    Sampled-out events return before a LogRecord is even created.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    sampler = _sampler
+    if sampler is not None and not sampler.keep(event, level):
+        return
+    logger.log(level, msg, *args, extra={"event": event, "payload": payload, "_sampled": sampler is not None})
+
+
+def setup_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                  sample_rates: Optional[Dict[str, float]] = None, console: bool = True) -> QueueListener:
+    """
+    Route the root logger through the async queue. Safe to call more than once; later
+    calls return the running listener. Returns the QueueListener (stopped at exit).
+    """
+    global _listener, _handler, _sampler
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        level = level or os.getenv("LOG_LEVEL", "INFO")
+        log_file = log_file or os.getenv("LOG_FILE")
+        rates = {**DEFAULT_SAMPLE_RATES, **parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))}
+        if sample_rates:
+            rates.update(sample_rates)
+
+        formatter = JsonFormatter(int(os.getenv("LOG_PAYLOAD_MAX_CHARS", PAYLOAD_MAX_CHARS)))
+        targets = [logging.StreamHandler(sys.stdout)] if console else []
+        if log_file:
+            os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+            targets.append(RotatingFileHandler(log_file, maxBytes=5_000_000, backupCount=3))
+        for h in targets:
+            h.setFormatter(formatter)
+
+        q = queue.Queue(maxsize=QUEUE_SIZE)
+        _handler = AsyncQueueHandler(q)
+        _sampler = SamplingFilter(rates)
+        _handler.addFilter(_sampler)
+        _listener = QueueListener(q, *targets, respect_handler_level=True)
+        _listener.start()
+
+        root = logging.getLogger()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.addHandler(_handler)
+        root.setLevel(level)
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener, _handler, _sampler
+    with _lock:
+        if _listener is None:
+            return
+        # stop() drains everything already queued before joining the thread
+        _listener.stop()
+        logging.getLogger().removeHandler(_handler)
+        if _handler.dropped:
+            sys.stderr.write(f"log_pipeline: dropped {_handler.dropped} records (queue full)\n")
+        _listener = None
+        _handler = None
+        _sampler = None
@@ -0,0 +1,96 @@
+"""
+ADK runner plugins.
+
+StructuredLoggingPlugin replaces google.adk's LoggingPlugin, which formats every callback
+with f-strings and print()s it synchronously. Here each callback emits one structured
+record through log_pipeline: only references to the relevant values are captured on the
+request path, and stringification, truncation and I/O happen on the logging thread.
+"""
+import logging
+from typing import Any, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from log_pipeline import log_event
+
+logger = logging.getLogger("agent.runner")
+
+
+def _parts(content) -> list:
+    """Cheap reference view of a Content: text parts as-is, other parts by kind/name."""
+    if not content or not getattr(content, "parts", None):
+        return []
+    out = []
+    for part in content.parts:
+        if part.text:
+            out.append(part.text)
+        elif part.function_call:
+            out.append({"function_call": part.function_call.name, "args": part.function_call.args})
+        elif part.function_response:
+            out.append({"function_response": part.function_response.name})
+        else:
+            out.append("other_part")
+    return out
+
+
+class StructuredLoggingPlugin(BasePlugin):
+    def __init__(self, name: str = "structured_logging_plugin"):
+        super().__init__(name)
+
+    async def on_user_message_callback(self, *, invocation_context, user_message) -> None:
+        log_event(logger, "user_message", "user message for invocation %s", invocation_context.invocation_id,
+                  payload={"session_id": invocation_context.session.id, "content": _parts(user_message)})
+
+    async def before_run_callback(self, *, invocation_context) -> None:
+        log_event(logger, "run_start", "invocation %s starting (agent %s)", invocation_context.invocation_id,
+                  invocation_context.agent.name)
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        log_event(logger, "run_end", "invocation %s completed", invocation_context.invocation_id)
+
+    async def on_event_callback(self, *, invocation_context, event) -> None:
+        log_event(logger, "event", "event %s from %s", event.id, event.author,
+                  payload={"content": _parts(event.content), "final": event.is_final_response()})
+
+    async def before_agent_callback(self, *, agent, callback_context) -> None:
+        log_event(logger, "agent_start", "agent %s starting", callback_context.agent_name)
+
+    async def after_agent_callback(self, *, agent, callback_context) -> None:
+        log_event(logger, "agent_end", "agent %s completed", callback_context.agent_name)
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> None:
+        config = llm_request.config
+        log_event(logger, "model_request", "model request from %s", callback_context.agent_name,
+                  payload={
+                      "model": llm_request.model,
+                      "system_instruction": getattr(config, "system_instruction", None),
+                      "contents": [_parts(c) for c in llm_request.contents],
+                      "tools": list(llm_request.tools_dict),
+                  })
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> None:
+        if llm_response.error_code:
+            log_event(logger, "model_error", "model error for %s: %s %s", callback_context.agent_name,
+                      llm_response.error_code, llm_response.error_message, level=logging.WARNING)
+            return
+        log_event(logger, "model_response", "model response for %s", callback_context.agent_name,
+                  payload={"content": _parts(llm_response.content), "usage": llm_response.usage_metadata})
+
+    async def before_tool_callback(self, *, tool, tool_args: dict[str, Any], tool_context) -> Optional[dict]:
+        log_event(logger, "tool_start", "tool %s called by %s", tool.name, tool_context.agent_name,
+                  payload={"args": tool_args})
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args: dict[str, Any], tool_context, result: dict) -> Optional[dict]:
+        log_event(logger, "tool_end", "tool %s completed", tool.name, payload={"result": result})
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error: Exception) -> None:
+        log_event(logger, "model_error", "model error for %s: %s", callback_context.agent_name, error,
+                  level=logging.ERROR)
+
+    async def on_tool_error_callback(self, *, tool, tool_args: dict[str, Any], tool_context,
+                                     error: Exception) -> Optional[dict]:
+        log_event(logger, "tool_error", "tool %s failed: %s", tool.name, error,
+                  payload={"args": tool_args}, level=logging.ERROR)
+        return None
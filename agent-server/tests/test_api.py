@@ -1,6 +1,9 @@
 from fastapi.testclient import TestClient
 from unittest.mock import patch, AsyncMock
 from app import app
+import ticket_store
+import data_loader
+import pandas as pd
 
 client = TestClient(app)
 
@@ -34,3 +37,47 @@ def test_run_agent_error(mock_run):
     
     assert response.status_code == 500
     assert "agent error" in response.json()["detail"]
+
+def test_tickets_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(ticket_store, "DB_PATH", tmp_path / "tickets.db")
+    ticket, _ = ticket_store.create_ticket("Spike", "body", "proj-1", "2025-01-05", "BigQuery")
+
+    response = client.get("/tickets", params={"project_id": "proj-1"})
+    assert response.status_code == 200
+    assert response.json()["tickets"] == [ticket]
+
+    response = client.get(f"/tickets/{ticket['ticket_id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Spike"
+
+    response = client.get("/tickets/TCK-999999")
+    assert response.status_code == 404
+
+def test_costs_query(monkeypatch):
+    monkeypatch.setattr(data_loader, "billing_df", pd.DataFrame({
+        "project_id": ["proj-1", "proj-1", "proj-2"],
+        "usage_start_time": ["2025-01-01", "2025-01-02", "2025-01-02"],
+        "service": ["BigQuery", "Dataflow", "BigQuery"],
+        "cost": [10.0, 20.0, 5.0],
+        "credits": [1.0, 0.0, 0.0],
+    }))
+    response = client.post("/costs/query", json={"group_by": ["service"], "filters": {"project_id": "proj-1"}})
+    assert response.status_code == 200
+    assert response.json()["rows"][0] == {"service": "Dataflow", "cost": 20.0, "credits": 0.0, "net_cost": 20.0}
+
+    response = client.post("/costs/query", json={"group_by": ["zone"]})
+    assert response.status_code == 400
+
+    response = client.post("/costs/query", json={"group_by": ["service"], "limit": -1})
+    assert response.status_code == 422
+
+def test_waste_endpoint(monkeypatch):
+    monkeypatch.setattr(data_loader, "assets_list", [
+        {"id": "disk-1", "type": "disk", "attached": False, "project": "proj-1", "estimated_monthly_cost": 5.5},
+        {"id": "ip-1", "type": "static-ip", "attached": False, "project": "proj-2", "estimated_monthly_cost": 7.2},
+    ])
+    response = client.get("/waste", params={"project_id": "proj-1"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 1
+    assert body["findings"][0]["asset_id"] == "disk-1"
@@ -0,0 +1,74 @@
+import pytest
+import pandas as pd
+import asset_index
+import data_loader
+import tools
+
+@pytest.fixture
+def mock_data():
+    dates = pd.date_range("2025-01-01", periods=20, freq="D")
+    data_loader.assets_list = [
+        {"id": "disk-1", "type": "disk", "attached": False, "project": "proj-1", "estimated_monthly_cost": 5.5},
+        {"id": "disk-2", "type": "disk", "attached": True, "project": "proj-1", "estimated_monthly_cost": 9.0},
+        {"id": "ip-1", "type": "static-ip", "attached": False, "project": "proj-2", "estimated_monthly_cost": 7.2},
+        {"id": "vm-idle", "type": "vm", "attached": True, "project": "proj-1"},
+        {"id": "vm-busy", "type": "vm", "attached": True, "project": "proj-1"},
+        {"id": "vm-estimate", "type": "vm", "attached": True, "project": "proj-2", "estimated_monthly_cost": 40.0},
+    ]
+    data_loader.metrics_list = [
+        {"timestamp": d.isoformat(), "instance": inst, "cpu_util": cpu}
+        for d in dates
+        for inst, cpu in (("vm-idle", 3.0), ("vm-busy", 55.0), ("vm-estimate", 2.0))
+    ]
+    data_loader.billing_df = pd.DataFrame({
+        "project_id": "proj-1",
+        "usage_start_time": dates.strftime("%Y-%m-%d"),
+        "service": "Compute Engine",
+        "cost": 2.0,
+        "credits": 0.0,
+        "instance": "vm-idle",
+    })
+    yield
+
+def test_lookup_by_project_and_type(mock_data):
+    assert sorted(asset_index.lookup("proj-1")["id"]) == ["disk-1", "disk-2", "vm-busy", "vm-idle"]
+    assert sorted(asset_index.lookup("proj-1", "vm")["id"]) == ["vm-busy", "vm-idle"]
+    assert list(asset_index.lookup(asset_type="static-ip")["id"]) == ["ip-1"]
+    assert asset_index.lookup("proj-x").empty
+
+def test_scan_idle_resources(mock_data):
+    res = asset_index.scan_idle_resources()
+    by_id = {f["asset_id"]: f for f in res["findings"]}
+    assert set(by_id) == {"disk-1", "ip-1", "vm-idle", "vm-estimate"}
+    # 14 days billed at 2.0/day scaled to 30 days
+    assert by_id["vm-idle"]["estimated_monthly_savings"] == 60.0
+    assert by_id["vm-idle"]["avg_cpu"] == 3.0
+    assert by_id["vm-estimate"]["basis"] == "asset estimate"
+    assert [f["asset_id"] for f in res["findings"]] == ["vm-idle", "vm-estimate", "ip-1", "disk-1"]
+    assert res["total_estimated_monthly_savings"] == 112.7
+
+def test_scan_idle_resources_billed_by_other_projects(mock_data):
+    # vm-idle belongs to proj-1 but is billed to proj-2 and proj-3 at 1.0/day each
+    billing = data_loader.billing_df
+    data_loader.billing_df = pd.concat([billing.assign(project_id="proj-2", cost=1.0),
+                                        billing.assign(project_id="proj-3", cost=1.0)], ignore_index=True)
+    vm = {f["asset_id"]: f for f in asset_index.scan_idle_resources("proj-1")["findings"]}["vm-idle"]
+    assert vm["basis"] == "billed cost, last 14d"
+    assert vm["estimated_monthly_savings"] == 60.0
+
+def test_scan_idle_resources_project_and_limit(mock_data):
+    res = asset_index.scan_idle_resources("proj-2", limit=1)
+    assert res["count"] == 2
+    assert [f["asset_id"] for f in res["findings"]] == ["vm-estimate"]
+    assert asset_index.scan_idle_resources("proj-x")["count"] == 0
+
+def test_index_rebuilt_when_assets_change(mock_data):
+    assert asset_index.scan_idle_resources("proj-3")["count"] == 0
+    data_loader.assets_list = data_loader.assets_list + [
+        {"id": "ip-9", "type": "static-ip", "attached": False, "project": "proj-3", "estimated_monthly_cost": 1.0}
+    ]
+    assert asset_index.scan_idle_resources("proj-3")["count"] == 1
+
+def test_scan_idle_resources_tool(mock_data):
+    res = tools.scan_idle_resources("proj-1")
+    assert [f["asset_id"] for f in res["findings"]] == ["vm-idle", "disk-1"]
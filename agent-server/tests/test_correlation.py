@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+import pandas as pd
+import correlation
+import data_loader
+import tools
+
+@pytest.fixture
+def mock_data():
+    # 60 days of proj-1 billing on vm-prod-1; cost and CPU both spike on days 20 and 45
+    dates = pd.date_range("2024-01-01", periods=60, freq="D")
+    cost = np.full(60, 10.0)
+    cpu = np.full(60, 20.0) + np.sin(np.arange(60))
+    for d in (20, 45):
+        cost[d] = 100.0
+        cpu[d] = 95.0
+    data_loader.billing_df = pd.DataFrame({
+        "project_id": "proj-1",
+        "usage_start_time": dates,
+        "service": "Compute Engine",
+        "cost": cost,
+        "instance": "vm-prod-1"
+    })
+    data_loader.metrics_list = [
+        {"timestamp": d.isoformat(), "instance": inst, "cpu_util": float(v)}
+        for d, v in zip(dates, cpu)
+        for inst in ("vm-prod-1",)
+    ] + [
+        {"timestamp": d.isoformat(), "instance": "vm-dev-1", "cpu_util": 5.0} for d in dates
+    ]
+    yield dates
+
+def test_rank_root_causes_prefers_correlated_cpu(mock_data):
+    spikes = [{"usage_start_time": str(mock_data[20]), "cost": 100.0},
+              {"usage_start_time": str(mock_data[45].date()), "cost": 100.0}]
+    res = correlation.rank_root_causes("proj-1", spikes)
+    assert res["spike_dates"] == ["2024-01-21", "2024-02-15"]
+    top = res["evidence"][0]
+    assert top["cause"] == "cpu:vm-prod-1"
+    assert top["co_occurrence"] == 1.0
+    assert top["lag_days"] == 0
+    assert top["correlation"] > 0.9
+    # instances the project does not bill against are not candidates
+    assert all(e["cause"] != "cpu:vm-dev-1" for e in res["evidence"])
+
+def test_rank_root_causes_known_pattern(mock_data):
+    # proj-1: release spike every 90 days when day index % 90 == 1
+    res = correlation.rank_root_causes("proj-1", [{"usage_start_time": str(mock_data[1].date())}])
+    causes = {e["cause"]: e for e in res["evidence"]}
+    assert causes["pattern:release_spike_every_90_days"]["co_occurrence"] == 1.0
+
+def test_known_anomaly_flags_match_generated_billing(tmp_path):
+    import data_generator as dg
+    df = dg.gen_billing_csv(days=120, projects=4, out_path=str(tmp_path / "billing.csv"))
+    # proj-4 is the Dataflow project, so both scheduled rules apply to it
+    proj = df[df.project_id == "proj-4"].reset_index(drop=True)
+    flags = dg.known_anomaly_flags(proj["usage_start_time"], 4)
+    assert set(flags) == {"release_spike_every_90_days", "monthly_dataflow_batch"}
+    flagged = np.logical_or.reduce(list(flags.values()))
+    assert flagged.any()
+    baseline = proj.loc[~flagged, "cost"].median()
+    assert (proj.loc[flagged, "cost"] > 3 * baseline).all()
+
+def test_rank_root_causes_no_spikes(mock_data):
+    res = correlation.rank_root_causes("proj-1", [])
+    assert res["evidence"] == []
+    res = correlation.rank_root_causes("proj-unknown", [{"usage_start_time": "2024-01-21"}])
+    assert res["evidence"] == []
+
+def test_correlate_spikes_tool(mock_data):
+    res = tools.correlate_spikes("proj-1", [{"usage_start_time": "2024-01-21"}])
+    assert res["project_id"] == "proj-1"
+    assert len(res["evidence"]) <= 3
@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+import pandas as pd
+import cost_query
+import data_loader
+import tools
+
+@pytest.fixture
+def mock_data():
+    data_loader.billing_df = pd.DataFrame({
+        "project_id": ["proj-a", "proj-a", "proj-a", "proj-b", "proj-b"],
+        "usage_start_time": ["2025-01-01", "2025-01-01", "2025-01-02", "2025-01-02", "2025-01-03"],
+        "service": ["BigQuery", "BigQuery", "Dataflow", "BigQuery", "Cloud Run"],
+        "region": ["us-central1", "us-central1", "europe-west1", "us-central1", "asia-south1"],
+        "sku": ["s1", "s1", "s2", "s1", "s3"],
+        "instance": ["vm-1", "vm-1", "vm-2", "vm-3", "vm-3"],
+        "cost": [10.0, 5.0, 20.0, 7.0, 3.0],
+        "credits": [1.0, 0.0, 2.0, 0.0, 0.5],
+    })
+    yield
+
+def test_total_without_group_by(mock_data):
+    assert cost_query.query_costs() == [{"cost": 45.0, "credits": 3.5, "net_cost": 41.5}]
+
+def test_group_by_service_with_filters(mock_data):
+    rows = cost_query.query_costs(filters={"project_id": "proj-a"}, group_by=["service"])
+    assert rows == [
+        {"service": "Dataflow", "cost": 20.0, "credits": 2.0, "net_cost": 18.0},
+        {"service": "BigQuery", "cost": 15.0, "credits": 1.0, "net_cost": 14.0},
+    ]
+
+def test_multi_dimension_and_date_range(mock_data):
+    rows = cost_query.query_costs(filters={"region": ["us-central1", "asia-south1"]},
+                                  group_by=["project_id", "region"], start_date="2025-01-02")
+    assert rows == [
+        {"project_id": "proj-b", "region": "us-central1", "cost": 7.0, "credits": 0.0, "net_cost": 7.0},
+        {"project_id": "proj-b", "region": "asia-south1", "cost": 3.0, "credits": 0.5, "net_cost": 2.5},
+    ]
+
+def test_group_by_date_is_ordered_by_day(mock_data):
+    rows = cost_query.query_costs(group_by=["date"], end_date="2025-01-02")
+    assert [(r["date"], r["cost"]) for r in rows] == [("2025-01-01", 15.0), ("2025-01-02", 27.0)]
+
+def test_unknown_values_and_dimensions(mock_data):
+    assert cost_query.query_costs(filters={"project_id": "proj-x"}, group_by=["sku"]) == []
+    with pytest.raises(ValueError):
+        cost_query.query_costs(group_by=["zone"])
+    with pytest.raises(ValueError):
+        cost_query.query_costs(filters={"date": "2025-01-01"})
+
+def test_cache_invalidated_on_new_dataset(mock_data):
+    first = cost_query.query_costs(group_by=["project_id"])
+    assert cost_query.query_costs(group_by=["project_id"]) == first
+    data_loader.billing_df = data_loader.billing_df.assign(cost=1.0)
+    assert cost_query.query_costs(group_by=["project_id"]) == [
+        {"project_id": "proj-a", "cost": 3.0, "credits": 3.0, "net_cost": 0.0},
+        {"project_id": "proj-b", "cost": 2.0, "credits": 0.5, "net_cost": 1.5},
+    ]
+
+def test_query_costs_tool(mock_data):
+    res = tools.query_costs(["instance"], {"project_id": "proj-b"}, limit=1)
+    assert res == {"rows": [{"instance": "vm-3", "cost": 10.0, "credits": 0.5, "net_cost": 9.5}]}
+    assert "error" in tools.query_costs(["zone"], {})
+
+def test_high_cardinality_dimensions_and_null_date():
+    n = 20000
+    rng = np.random.default_rng(0)
+    days = pd.Timestamp.now("UTC").normalize().tz_localize(None) - pd.to_timedelta(rng.integers(0, 2900, n), unit="D")
+    usage = pd.Series(days.strftime("%Y-%m-%d"), dtype=object)
+    usage[0] = None  # a row without a date must be skipped, not break every query
+    data_loader.billing_df = pd.DataFrame({
+        "project_id": [f"p{i % 2000}" for i in range(n)],
+        "usage_start_time": usage,
+        "service": [f"svc-{i % 5}" for i in range(n)],
+        "region": [f"r{i % 3}" for i in range(n)],
+        "sku": [f"sku-{i}" for i in range(n)],
+        "instance": [f"vm-{i}" for i in range(n)],
+        "cost": 1.0,
+        "credits": 0.0,
+    })
+    rows = cost_query.query_costs(group_by=["project_id", "sku", "date"], limit=5)
+    assert len(rows) == 5
+    total = cost_query.query_costs()
+    assert total == [{"cost": float(n - 1), "credits": 0.0, "net_cost": float(n - 1)}]
+    # p1 has rows i = 1, 2001, ... -> 10 rows, all within the last 3000 days
+    assert tools.bq_query_cost_by_project("p1", 3000) == [{"project_id": "p1", "cost": 10.0}]
+    res = tools.query_costs(["instance"], {"project_id": "p1"})
+    assert "error" not in res and len(res["rows"]) == 10
+
+def test_non_positive_limit_rejected(mock_data):
+    with pytest.raises(ValueError):
+        cost_query.query_costs(group_by=["project_id"], limit=-1)
+    with pytest.raises(ValueError):
+        cost_query.query_costs(group_by=["project_id"], limit=0)
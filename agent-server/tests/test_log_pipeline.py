@@ -0,0 +1,119 @@
+import json
+import queue
+import logging
+from logging.handlers import QueueListener
+import log_pipeline
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+def test_truncate_long_strings_and_collections():
+    out = log_pipeline.truncate({"prompt": "x" * 50, "rows": list(range(10))}, max_chars=10, max_items=3)
+    assert out["prompt"] == "x" * 10 + "...(+40 chars)"
+    assert out["rows"] == [0, 1, 2, "...(+7 items)"]
+    assert log_pipeline.truncate(object(), max_chars=5).endswith("chars)")
+
+def test_json_formatter_structured_fields():
+    record = logging.LogRecord("agent", logging.INFO, __file__, 1, "tool %s done", ("forecast",), None)
+    record.event = "tool_end"
+    record.payload = {"result": "y" * 30}
+    line = json.loads(log_pipeline.JsonFormatter(max_chars=8).format(record))
+    assert line["msg"] == "tool for...(+10 chars)"
+    assert line["event"] == "tool_end"
+    assert line["payload"] == {"result": "y" * 8 + "...(+22 chars)"}
+    assert line["level"] == "INFO"
+
+def test_sampling_filter_per_event():
+    f = log_pipeline.SamplingFilter({"model_request": 0.0, "event": 1.0})
+    def rec(event, level=logging.INFO):
+        r = logging.LogRecord("agent", level, __file__, 1, "m", None, None)
+        r.event = event
+        return r
+    assert not f.filter(rec("model_request"))
+    assert f.filter(rec("model_request", logging.ERROR))
+    assert f.filter(rec("event"))
+    assert f.filter(rec("unlisted"))
+
+def test_parse_sample_rates():
+    assert log_pipeline.parse_sample_rates("a=0.5, b=2,bad,c=x") == {"a": 0.5, "b": 1.0}
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    class Payload:
+        formatted = 0
+        def __str__(self):
+            Payload.formatted += 1
+            return "payload"
+
+    q = queue.Queue(maxsize=1)
+    handler = log_pipeline.AsyncQueueHandler(q)
+    logger = logging.getLogger("test_log_pipeline.defer")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning("first %s", Payload())
+        logger.warning("second %s", Payload())
+    finally:
+        logger.removeHandler(handler)
+    assert Payload.formatted == 0
+    assert handler.dropped == 1
+    assert q.get_nowait().getMessage() == "first payload"
+
+def test_log_event_through_listener():
+    q = queue.Queue()
+    target = ListHandler()
+    target.setFormatter(log_pipeline.JsonFormatter())
+    listener = QueueListener(q, target)
+    handler = log_pipeline.AsyncQueueHandler(q)
+    logger = logging.getLogger("test_log_pipeline.event")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    listener.start()
+    try:
+        log_pipeline.log_event(logger, "ticket_created", "Ticket created: %s", "TCK-000001",
+                               payload={"title": "Spike"})
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+    line = json.loads(target.lines[0])
+    assert line["msg"] == "Ticket created: TCK-000001"
+    assert line["event"] == "ticket_created"
+    assert line["payload"] == {"title": "Spike"}
+
+def test_log_event_sampled_out_before_record(monkeypatch):
+    monkeypatch.setattr(log_pipeline, "_sampler", log_pipeline.SamplingFilter({"model_request": 0.0}))
+    target = ListHandler()
+    logger = logging.getLogger("test_log_pipeline.sampled")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(target)
+    try:
+        log_pipeline.log_event(logger, "model_request", "dropped")
+        log_pipeline.log_event(logger, "tool_end", "kept")
+    finally:
+        logger.removeHandler(target)
+    assert target.lines == ["kept"]
+
+def test_structured_logging_plugin_tool_events():
+    import asyncio
+    from types import SimpleNamespace
+    from plugins import StructuredLoggingPlugin
+
+    target = ListHandler()
+    logger = logging.getLogger("agent.runner")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(target)
+    try:
+        plugin = StructuredLoggingPlugin()
+        tool = SimpleNamespace(name="ticket_create")
+        ctx = SimpleNamespace(agent_name="cloud_cost_agent")
+        asyncio.run(plugin.before_tool_callback(tool=tool, tool_args={"title": "t"}, tool_context=ctx))
+        asyncio.run(plugin.after_tool_callback(tool=tool, tool_args={}, tool_context=ctx, result={"ok": 1}))
+    finally:
+        logger.removeHandler(target)
+    assert target.lines == ["tool ticket_create called by cloud_cost_agent", "tool ticket_create completed"]
@@ -0,0 +1,81 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+import ticket_store
+import tools
+from agent_runner import known_spike_result
+
+@pytest.fixture
+def ticket_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(ticket_store, "DB_PATH", tmp_path / "tickets.db")
+    yield tmp_path / "tickets.db"
+
+def test_create_ticket_is_idempotent(ticket_db):
+    t1, created1 = ticket_store.create_ticket("Spike", "body", "proj-1", "2025-01-05", "BigQuery")
+    t2, created2 = ticket_store.create_ticket("Spike again", "other", "proj-1", "2025-01-05 00:00:00", "BigQuery")
+    assert created1 and not created2
+    assert t1 == t2
+    assert t1["ticket_id"] == "TCK-000001"
+    t3, created3 = ticket_store.create_ticket("Spike", "body", "proj-1", "2025-01-05", "Dataflow")
+    assert created3 and t3["ticket_id"] != t1["ticket_id"]
+
+def test_incomplete_spikes_are_not_deduplicated(ticket_db):
+    title = "Cost Spike detected for proj-1"
+    # same title, different spikes, each missing the project or the spike date
+    no_date = [tools.ticket_create(title, f"spike {i}", "proj-1", "", "BigQuery") for i in range(2)]
+    no_project = [tools.ticket_create(title, f"spike {i}", "", f"2025-01-0{i + 1}") for i in range(2)]
+    tickets = no_date + no_project
+    assert not any(t["existing"] for t in tickets)
+    assert len({t["ticket_id"] for t in tickets}) == 4
+    assert ticket_store.find_ticket("proj-1", "", "BigQuery") is None
+
+def test_db_parent_directory_is_created(tmp_path, monkeypatch):
+    db_path = tmp_path / "missing" / "nested" / "tickets.db"
+    monkeypatch.setattr(ticket_store, "DB_PATH", db_path)
+    ticket = tools.ticket_create("Spike", "body", "proj-1", "2025-01-05", "BigQuery")
+    assert ticket["ticket_id"] == "TCK-000001"
+    assert db_path.exists()
+
+def test_ticket_survives_new_connection(ticket_db):
+    t, _ = ticket_store.create_ticket("Spike", "body", "proj-1", "2025-01-05", "BigQuery")
+    assert ticket_store.get_ticket(t["ticket_id"]) == t
+    assert ticket_store.find_ticket("proj-1", "2025-01-05", "BigQuery") == t
+    assert ticket_store.get_ticket("TCK-999999") is None
+
+def test_list_tickets_filters(ticket_db):
+    ticket_store.create_ticket("a", "", "proj-1", "2025-01-01", "BigQuery")
+    ticket_store.create_ticket("b", "", "proj-1", "2025-01-10", "BigQuery")
+    ticket_store.create_ticket("c", "", "proj-2", "2025-01-10", "Dataflow")
+    assert [t["title"] for t in ticket_store.list_tickets(project_id="proj-1")] == ["b", "a"]
+    assert [t["title"] for t in ticket_store.list_tickets(service="Dataflow")] == ["c"]
+    assert [t["title"] for t in ticket_store.list_tickets(since="2025-01-05", until="2025-01-31")] == ["c", "b"]
+    assert len(ticket_store.list_tickets(limit=1)) == 1
+
+def test_concurrent_creates_yield_single_ticket(ticket_db):
+    def create(i):
+        return ticket_store.create_ticket(f"Spike {i}", "body", "proj-1", "2025-01-05", "BigQuery")
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(create, range(64)))
+
+    assert len({t["ticket_id"] for t, _ in results}) == 1
+    assert sum(created for _, created in results) == 1
+    assert len(ticket_store.list_tickets()) == 1
+
+def test_ticket_create_tool_marks_existing(ticket_db):
+    first = tools.ticket_create("Spike", "body", "proj-1", "2025-01-05", "BigQuery")
+    second = tools.ticket_create("Spike", "body", "proj-1", "2025-01-05", "BigQuery")
+    assert first["existing"] is False
+    assert second["existing"] is True
+    assert first["ticket_id"] == second["ticket_id"]
+
+def test_known_spike_result(ticket_db):
+    rows = [{"usage_start_time": f"2025-01-{d:02d} 00:00:00", "cost": 10.0 + (d % 3) * 0.1, "service": "BigQuery"}
+            for d in range(1, 15)]
+    rows[9]["cost"] = 200.0
+    assert known_spike_result("proj-1", rows) is None
+
+    ticket_store.create_ticket("Spike", "body", "proj-1", "2025-01-10", "BigQuery")
+    res = known_spike_result("proj-1", rows)
+    assert res["known_spike"] is True
+    assert res["tickets"][0]["spike_date"] == "2025-01-10"
+    assert "already ticketed" in res["agent_result"][0]["content"]["parts"][0]["text"]
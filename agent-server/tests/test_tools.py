@@ -3,6 +3,7 @@ import pandas as pd
 from unittest.mock import patch, MagicMock
 import tools
 import data_loader
+import ticket_store
 
 @pytest.fixture
 def mock_data():
@@ -35,7 +36,8 @@ def test_monitoring_fetch_cpu(mock_data):
     assert len(res) == 1
     assert res[0] == {"cpu": 0.8}
 
-def test_ticket_create():
+def test_ticket_create(tmp_path, monkeypatch):
+    monkeypatch.setattr(ticket_store, "DB_PATH", tmp_path / "tickets.db")
     ticket = tools.ticket_create("Test Ticket", "Body")
     assert ticket["title"] == "Test Ticket"
     assert ticket["ticket_id"].startswith("TCK-")
@@ -0,0 +1,182 @@
+"""
+SQLite-backed ticket store.
+
+Tickets are deduplicated on an idempotency key built from (project_id, spike_date, service),
+so re-analysing the same spike returns the existing ticket instead of creating a new one.
+Tickets missing a project or spike date are never deduplicated: each one gets a unique key.
+"""
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path(os.getenv("TICKET_DB_PATH", "../data/tickets.db"))
+
+_init_lock = threading.Lock()
+_initialized_path: Optional[Path] = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id TEXT UNIQUE,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    project_id TEXT,
+    spike_date TEXT,
+    service TEXT,
+    title TEXT NOT NULL,
+    body TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_project_date ON tickets (project_id, spike_date);
+CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets (created_at);
+"""
+
+_COLUMNS = ("ticket_id", "project_id", "spike_date", "service", "title", "body", "created_at")
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized_path
+    path = Path(DB_PATH)
+    if _initialized_path != path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if _initialized_path != path:
+        with _init_lock:
+            if _initialized_path != path:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _initialized_path = path
+    return conn
+
+
+def _normalize_date(value) -> str:
+    if value in (None, ""):
+        return ""
+    try:
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def idempotency_key(project_id: str, spike_date, service: str) -> Optional[str]:
+    """Dedup key for a spike, or None when project_id or spike_date is missing."""
+    spike_date = _normalize_date(spike_date)
+    if not project_id or not spike_date:
+        return None
+    return f"{project_id}|{spike_date}|{service or ''}"
+
+
+def _row_to_ticket(row: sqlite3.Row) -> dict:
+    return {k: row[k] for k in _COLUMNS}
+
+
+def create_ticket(title: str, body: str, project_id: str = "", spike_date: str = "", service: str = ""):
+    """
+    Create a ticket, or return the existing one with the same idempotency key.
+    Returns (ticket, created) where created is False for a deduplicated request.
+    Safe under concurrent callers: the UNIQUE key makes the insert race-free and the
+    write transaction keeps readers from seeing a row before its ticket_id is set.
+    """
+    spike_date = _normalize_date(spike_date)
+    key = idempotency_key(project_id, spike_date, service) or f"unique:{uuid.uuid4().hex}"
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO tickets (idempotency_key, project_id, spike_date, service, title, body, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, project_id or None, spike_date or None, service or None, title, body, time.time()),
+        )
+        created = cur.rowcount == 1
+        if created:
+            conn.execute("UPDATE tickets SET ticket_id = printf('TCK-%06d', id) WHERE id = ?", (cur.lastrowid,))
+        row = conn.execute("SELECT * FROM tickets WHERE idempotency_key = ?", (key,)).fetchone()
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return _row_to_ticket(row), created
+
+
+def get_ticket(ticket_id: str) -> Optional[dict]:
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_ticket(row) if row else None
+
+
+def find_ticket(project_id: str, spike_date, service: str) -> Optional[dict]:
+    key = idempotency_key(project_id, spike_date, service)
+    if key is None:
+        return None
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM tickets WHERE idempotency_key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_ticket(row) if row else None
+
+
+def list_tickets(project_id: Optional[str] = None, service: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 limit: int = 100, offset: int = 0) -> List[dict]:
+    """List tickets, newest spike first; since/until filter on spike_date (inclusive)."""
+    clauses, params = [], []
+    if project_id:
+        clauses.append("project_id = ?")
+        params.append(project_id)
+    if service:
+        clauses.append("service = ?")
+        params.append(service)
+    if since:
+        clauses.append("spike_date >= ?")
+        params.append(_normalize_date(since))
+    if until:
+        clauses.append("spike_date <= ?")
+        params.append(_normalize_date(until))
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM tickets{where} ORDER BY spike_date DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, int(limit), int(offset)),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [_row_to_ticket(r) for r in rows]
+
+
+def known_spike_tickets(project_id: str, spikes: List[dict]) -> Optional[List[dict]]:
+    """
+    Return the existing tickets for `spikes` (rows with usage_start_time and service)
+    if every one of them is already ticketed, else None.
+    """
+    if not spikes:
+        return None
+    conn = _connect()
+    try:
+        tickets = {}
+        for s in spikes:
+            key = idempotency_key(project_id, s.get("usage_start_time"), s.get("service", ""))
+            row = key and conn.execute("SELECT * FROM tickets WHERE idempotency_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            tickets[row["ticket_id"]] = _row_to_ticket(row)
+    finally:
+        conn.close()
+    logger.info("Known spike(s) for %s: %s", project_id, sorted(tickets))
+    return list(tickets.values())
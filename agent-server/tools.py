@@ -1,64 +1,94 @@
 import pandas as pd
 import numpy as np
 import math
-import time
 import logging
 from typing import List
 import data_loader
+import asset_index
+import correlation
+import cost_query
+import ticket_store
+from log_pipeline import log_event
 
 logger = logging.getLogger(__name__)
 
 def bq_query_cost_by_project(project_id: str, num_days: int):
-    # Access data from data_loader
-    billing_df = data_loader.billing_df
-    if billing_df.empty:
+    if data_loader.billing_df.empty:
         logger.warning("Billing data is empty when querying cost.")
         return []
-        
-    cutoff = pd.Timestamp.utcnow() - pd.Timedelta(days=num_days)
-    # Ensure usage_start_time is datetime if not already (it should be handled in loader but good to be safe)
-    # Actually loader handles it.
-    
-    # We need to handle timezone awareness matching the loader
-    # Loader parses dates, but let's check if we need to convert cutoff
-    # The loader code: billing_df = pd.read_csv(..., parse_dates=["usage_start_time"])
-    # In original code, there was some tz conversion logic in sequential_analysis, 
-    # but bq_query_cost_by_project used string comparison: cutoff.strftime("%Y-%m-%d")
-    
-    # Original code:
-    # cutoff = pd.Timestamp.utcnow() - pd.Timedelta(days=num_days)
-    # df = billing_df[billing_df["usage_start_time"] >= cutoff.strftime("%Y-%m-%d")]
-    
-    # This relies on string comparison which might be fragile if column is datetime.
-    # If column is datetime, comparing with string works in pandas often but let's be robust.
-    # However, to preserve exact behavior I'll stick close to original but add safety.
-    
+
+    # Served from the cost_query cube: the project/date filters are pushed down before aggregation
+    cutoff = pd.Timestamp.now("UTC") - pd.Timedelta(days=num_days)
     try:
-        df = billing_df[billing_df["usage_start_time"] >= cutoff.strftime("%Y-%m-%d")]
-        # Filter by project_id
-        df = df[df["project_id"] == project_id]
-        out = df.groupby("project_id").cost.sum().reset_index().to_dict(orient="records")
-        return out
+        rows = cost_query.query_costs(filters={"project_id": project_id}, group_by=["project_id"],
+                                      start_date=cutoff.strftime("%Y-%m-%d"))
+        return [{"project_id": r["project_id"], "cost": r["cost"]} for r in rows]
     except Exception as e:
-        logger.error(f"Error in bq_query_cost_by_project: {e}")
+        logger.error("Error in bq_query_cost_by_project: %s", e)
         return []
 
 
+def query_costs(group_by: List[str], filters: dict, start_date: str = "", end_date: str = "", limit: int = 50):
+    """
+    Aggregate billing cost grouped by any of project_id, service, region, sku, instance, date.
+    filters maps a dimension to a value or list of values, e.g. {"project_id": "proj-1", "region": ["us-central1"]}.
+    start_date / end_date are inclusive YYYY-MM-DD bounds (empty = unbounded).
+    Each row has the group-by values plus cost, credits and net_cost (net of credits).
+    """
+    try:
+        rows = cost_query.query_costs(filters=filters, group_by=group_by, start_date=start_date or None,
+                                      end_date=end_date or None, limit=limit)
+        return {"rows": rows}
+    except ValueError as e:
+        return {"rows": [], "error": str(e)}
+    except Exception as e:
+        logger.error("Error in query_costs: %s", e)
+        return {"rows": [], "error": str(e)}
+
+
 def monitoring_fetch_cpu(days: int):
     # return up to last `days` entries
     metrics_list = data_loader.metrics_list
     return metrics_list[-days:]
 
 
-def ticket_create(title: str, body: str):
-    ticket = {
-        "ticket_id": f"TCK-{abs(hash(title)) % 100000}",
-        "title": title,
-        "body": body,
-        "created_at": time.time()
-    }
-    logger.info(f"Ticket created: {ticket}")
-    return ticket
+def correlate_spikes(project_id: str, spikes: List[dict]):
+    """
+    Pre-rank likely root causes for billing spikes using the local correlation engine.
+    Returns {"project_id", "spike_dates", "evidence": [{"cause", "score", "evidence", ...}]}.
+    """
+    try:
+        return correlation.rank_root_causes(project_id, spikes)
+    except Exception as e:
+        logger.error("Error in correlate_spikes: %s", e)
+        return {"project_id": project_id, "spike_dates": [], "evidence": [], "note": str(e)}
+
+
+def scan_idle_resources(project_id: str = ""):
+    """
+    Flag waste: unattached disks / static IPs and idle VMs (low CPU over the last 14 days),
+    for one project or all projects when project_id is empty. Each finding has asset_id,
+    project, type, reason and estimated_monthly_savings; the top 20 by savings are returned.
+    """
+    try:
+        return asset_index.scan_idle_resources(project=project_id or None, limit=20)
+    except Exception as e:
+        logger.error("Error in scan_idle_resources: %s", e)
+        return {"findings": [], "count": 0, "total_estimated_monthly_savings": 0.0, "note": str(e)}
+
+
+def ticket_create(title: str, body: str, project_id: str = "", spike_date: str = "", service: str = ""):
+    """
+    Create a ticket for a cost spike. Tickets are keyed on (project_id, spike_date, service),
+    so creating the same spike twice returns the existing ticket with "existing": True.
+    Without a project_id and spike_date a new ticket is always created.
+    """
+    ticket, created = ticket_store.create_ticket(title, body, project_id, spike_date, service)
+    if created:
+        log_event(logger, "ticket_created", "Ticket created: %s", ticket["ticket_id"], payload=ticket)
+    else:
+        log_event(logger, "ticket_exists", "Ticket already exists: %s", ticket["ticket_id"])
+    return {**ticket, "existing": not created}
 
 
 def forecast_costs(params: dict):
@@ -104,5 +134,5 @@ def forecast_costs(params: dict):
             preds.append({"date": date, "predicted": round(max(pred, 0.0), 2)})
         return {"forecast": preds, "model": "linear+weekly", "coeffs": [float(c) for c in coeffs]}
     except Exception as e:
-        logger.error(f"Error in forecast_costs: {e}")
+        logger.error("Error in forecast_costs: %s", e)
         return {"forecast": [], "model": "error", "note": str(e)}